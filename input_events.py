@@ -0,0 +1,207 @@
+import sys
+import ctypes
+from typing import List, Tuple
+import pyautogui
+
+
+if sys.platform == 'win32':
+    from ctypes import wintypes
+
+    INPUT_MOUSE = 0
+    INPUT_KEYBOARD = 1
+    KEYEVENTF_KEYUP = 0x0002
+    KEYEVENTF_UNICODE = 0x0004
+    MOUSEEVENTF_MOVE = 0x0001
+    MOUSEEVENTF_LEFTDOWN = 0x0002
+    MOUSEEVENTF_LEFTUP = 0x0004
+    MOUSEEVENTF_ABSOLUTE = 0x8000
+    SM_CXSCREEN = 0
+    SM_CYSCREEN = 1
+
+    class MOUSEINPUT(ctypes.Structure):
+        _fields_ = [('dx', wintypes.LONG),
+                    ('dy', wintypes.LONG),
+                    ('mouseData', wintypes.DWORD),
+                    ('dwFlags', wintypes.DWORD),
+                    ('time', wintypes.DWORD),
+                    ('dwExtraInfo', wintypes.WPARAM)]
+
+    class KEYBDINPUT(ctypes.Structure):
+        _fields_ = [('wVk', wintypes.WORD),
+                    ('wScan', wintypes.WORD),
+                    ('dwFlags', wintypes.DWORD),
+                    ('time', wintypes.DWORD),
+                    ('dwExtraInfo', wintypes.WPARAM)]
+
+    class HARDWAREINPUT(ctypes.Structure):
+        _fields_ = [('uMsg', wintypes.DWORD),
+                    ('wParamL', wintypes.WORD),
+                    ('wParamH', wintypes.WORD)]
+
+    class _INPUTUNION(ctypes.Union):
+        _fields_ = [('mi', MOUSEINPUT),
+                    ('ki', KEYBDINPUT),
+                    ('hi', HARDWAREINPUT)]
+
+    class INPUT(ctypes.Structure):
+        _anonymous_ = ('u',)
+        _fields_ = [('type', wintypes.DWORD),
+                    ('u', _INPUTUNION)]
+
+    _user32 = ctypes.WinDLL('user32', use_last_error=True)
+    _user32.SendInput.argtypes = (wintypes.UINT, ctypes.POINTER(INPUT), ctypes.c_int)
+    _user32.SendInput.restype = wintypes.UINT
+
+# virtual-key codes of the keys InputSequence.press accepts, named as in pyautogui
+_VIRTUAL_KEYS = {'enter': 0x0D, 'tab': 0x09, 'esc': 0x1B}
+
+
+class InputSequence:
+    """Mouse clicks and key strokes sent to the focused window as one batch.
+
+    On Windows the whole sequence is dispatched with a single SendInput call, so no other input
+    can interleave with it. Other platforms replay it with pyautogui.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty InputSequence.
+        """
+        self._actions: List[Tuple] = []
+
+    def click(self, x: int, y: int) -> 'InputSequence':
+        """
+        Append a left click at a screen position.
+
+        Args:
+            x (int): x coordinate on the primary monitor.
+            y (int): y coordinate on the primary monitor.
+
+        Returns:
+            InputSequence: This sequence, for chaining.
+        """
+        self._actions.append(('click', x, y))
+        return self
+
+    def type(self, text: str) -> 'InputSequence':
+        """
+        Append the key strokes typing a text.
+
+        Args:
+            text (str): The text to type.
+
+        Returns:
+            InputSequence: This sequence, for chaining.
+        """
+        self._actions.append(('type', text))
+        return self
+
+    def press(self, key: str) -> 'InputSequence':
+        """
+        Append a key press.
+
+        Args:
+            key (str): Name of the key, one of 'enter', 'tab' and 'esc'.
+
+        Returns:
+            InputSequence: This sequence, for chaining.
+
+        Raises:
+            ValueError: If the key is not supported.
+        """
+        if key not in _VIRTUAL_KEYS:
+            raise ValueError(f'The key {key} is not supported.')
+        self._actions.append(('press', key))
+        return self
+
+    def send(self) -> None:
+        """
+        Send the sequence to the focused window.
+
+        Raises:
+            OSError: If Windows rejects the input events.
+        """
+        if sys.platform != 'win32':
+            for action in self._actions:
+                if action[0] == 'click':
+                    pyautogui.click(action[1], action[2], _pause=False)
+                elif action[0] == 'type':
+                    pyautogui.typewrite(action[1], _pause=False)
+                else:
+                    pyautogui.press(action[1], _pause=False)
+            return
+
+        events = []
+        for action in self._actions:
+            if action[0] == 'click':
+                events.extend(_click_events(action[1], action[2]))
+            elif action[0] == 'type':
+                events.extend(_unicode_events(action[1]))
+            else:
+                events.extend(_virtual_key_events(_VIRTUAL_KEYS[action[1]]))
+        inputs = (INPUT * len(events))(*events)
+        sent = _user32.SendInput(len(inputs), inputs, ctypes.sizeof(INPUT))
+        if sent != len(inputs):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+
+def _click_events(x: int, y: int) -> List['INPUT']:
+    """
+    Build the events of a left click at a screen position.
+
+    Args:
+        x (int): x coordinate on the primary monitor.
+        y (int): y coordinate on the primary monitor.
+
+    Returns:
+        List[INPUT]: Absolute move, button down and button up events.
+    """
+    # absolute coordinates are normalized to 0..65535 over the primary monitor
+    width = _user32.GetSystemMetrics(SM_CXSCREEN)
+    height = _user32.GetSystemMetrics(SM_CYSCREEN)
+    (dx, dy) = (x * 65535 // (width - 1), y * 65535 // (height - 1))
+    events = []
+    for flags in (MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE, MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP):
+        event = INPUT(type=INPUT_MOUSE)
+        (event.mi.dx, event.mi.dy, event.mi.dwFlags) = (dx, dy, flags)
+        events.append(event)
+    return events
+
+
+def _unicode_events(text: str) -> List['INPUT']:
+    """
+    Build the key down and key up events typing a text.
+
+    Args:
+        text (str): The text to type.
+
+    Returns:
+        List[INPUT]: Two unicode key events per UTF-16 code unit.
+    """
+    events = []
+    # KEYEVENTF_UNICODE takes UTF-16 code units, characters outside the BMP become surrogate pairs
+    for code_unit in memoryview(text.encode('utf-16-le')).cast('H'):
+        for flags in (KEYEVENTF_UNICODE, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP):
+            event = INPUT(type=INPUT_KEYBOARD)
+            (event.ki.wScan, event.ki.dwFlags) = (code_unit, flags)
+            events.append(event)
+    return events
+
+
+def _virtual_key_events(vk: int) -> List['INPUT']:
+    """
+    Build the key down and key up events of a virtual key.
+
+    Args:
+        vk (int): Virtual-key code.
+
+    Returns:
+        List[INPUT]: Key down and key up events.
+    """
+    events = []
+    for flags in (0, KEYEVENTF_KEYUP):
+        event = INPUT(type=INPUT_KEYBOARD)
+        (event.ki.wVk, event.ki.dwFlags) = (vk, flags)
+        events.append(event)
+    return events
+
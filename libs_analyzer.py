@@ -1,16 +1,32 @@
 import numpy as np
 import cv2
-import imutils
 import pyautogui
+import mss
 import os
 from enum import Enum
 import time
-from datetime import datetime
-from typing import Tuple, List, Dict
-from pyvda import AppView, get_apps_by_z_order, VirtualDesktop, get_virtual_desktops
+from typing import Tuple, List, Dict, Optional
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import functools
 import pandas as pd
+from input_events import InputSequence
+import numba
+from numba import njit, prange
 
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    # watchdog is optional, FolderWatcher falls back to polling the folder
+    Observer = None
+    FileSystemEventHandler = object
+
+# the default TBB threading layer keeps the process from exiting once a parallel kernel was first
+# launched from a worker thread, such as the executor threads of the server; OpenMP shuts down cleanly
+if 'NUMBA_THREADING_LAYER' not in os.environ:
+    numba.config.THREADING_LAYER = 'omp'
 
 class AnalyzerStatus(Enum):
     IDLE = 1
@@ -40,9 +56,310 @@ class UnkonwnButtonNameError(Exception):
         self.message = message
         super().__init__(self.message)
 
+def _dir_entry_count(path: str) -> int:
+    """
+    Count the files and folders in a folder without building a list of their names.
+
+    Args:
+        path (str): Path to the folder.
+
+    Returns:
+        int: Number of entries in the folder.
+    """
+    with os.scandir(path) as it:
+        return sum(1 for _ in it)
+
+class _NewEntryHandler(FileSystemEventHandler):
+    """Watchdog handler that sets an event when a file or folder is created."""
+    def __init__(self, event: threading.Event) -> None:
+        super().__init__()
+        self.event = event
+
+    def on_created(self, event) -> None:
+        self.event.set()
+
+class FolderWatcher:
+    """Wait for a new file or folder to appear in a folder.
+
+    Filesystem notifications from watchdog (ReadDirectoryChangesW on Windows, inotify on Linux)
+    are used when watchdog is installed, otherwise the number of entries in the folder is polled.
+
+    A watcher given a running watchdog Observer schedules its folder on it once and keeps the watch
+    between start and stop calls, so repeated operations do not set up the watch again.
+    """
+
+    # polls between rescans of the folder even if its modification time did not change, since
+    # coarse timestamps (FAT in 2 second steps, SMB shares) can hide a new entry
+    RESCAN_TICKS = 10
+
+    def __init__(self, path: str, sleep_func: Callable[[float], None] = time.sleep,
+                 observer: Optional['Observer'] = None) -> None:
+        """
+        Initialize the FolderWatcher.
+
+        Args:
+            path (str): Path to the folder to watch.
+            sleep_func (Callable, optional): Sleep function used while waiting. Defaults to time.sleep.
+            observer (Observer, optional): Running watchdog Observer shared with other watchers and
+                stopped by its owner. Defaults to None, a private Observer per start and stop.
+        """
+        self.path = path
+        self.sleep_func = sleep_func
+        self._event = threading.Event()
+        self._shared = observer is not None
+        self._observer = observer
+        self._watch = None
+        self._n = None
+        self._mtime = None
+        self._ticks = 0
+
+    def start(self) -> None:
+        """
+        Start watching the folder. Only entries created after this call are reported.
+        """
+        if Observer is None:
+            # counted afresh, a count kept since the last operation cannot be validated by the
+            # modification time on filesystems with coarse timestamps (FAT, SMB shares)
+            self._mtime = os.stat(self.path).st_mtime_ns
+            self._n = _dir_entry_count(self.path)
+            self._ticks = 0
+            return
+        self._event.clear()
+        if self._observer is None:
+            self._observer = Observer()
+            self._observer.start()
+        if self._watch is None:
+            self._watch = self._observer.schedule(_NewEntryHandler(self._event), self.path, recursive=False)
+
+    def stop(self) -> None:
+        """
+        Stop watching the folder. A watch on a shared Observer stays scheduled for the next start.
+        """
+        if self._observer is not None and not self._shared:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+            self._watch = None
+
+    def wait(self, time_out: float) -> None:
+        """
+        Wait until a new entry appears in the folder.
+
+        Args:
+            time_out (float): Maximum time to wait in seconds.
+
+        Raises:
+            TimeOutError: If no new entry appears within time_out.
+        """
+        curr_t = time.time()
+        if self._observer is not None and self.sleep_func is time.sleep:
+            # nothing to cooperate with, block until the notification arrives
+            if not self._event.wait(time_out):
+                raise TimeOutError()
+            print(f'elapsed time: {time.time() - curr_t}')
+            return
+        if self._observer is not None:
+            # only a flag is checked per tick, the sleep function keeps the wait cooperative
+            interval = 0.05
+            has_new_entry = self._event.is_set
+        else:
+            interval = 0.2
+            has_new_entry = self._poll_new_entry
+        while not has_new_entry():
+            self.sleep_func(interval)
+            elapsed = time.time() - curr_t
+            if elapsed > time_out:
+                raise TimeOutError()
+        print(f'elapsed time: {time.time() - curr_t}')
+
+    def _poll_new_entry(self) -> bool:
+        """
+        Polling fallback: one stat per call, the folder is only rescanned when its modification time
+        changes or every RESCAN_TICKS calls.
+
+        Returns:
+            bool: True if the folder has more entries than when watching started.
+        """
+        self._ticks += 1
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime and self._ticks % self.RESCAN_TICKS:
+            return False
+        self._mtime = mtime
+        return _dir_entry_count(self.path) > self._n
+
+@functools.lru_cache(maxsize=None)
+def _load_template(path: str) -> np.ndarray:
+    """
+    Load a button template in grayscale, reading each file from disk only once per process.
+
+    Args:
+        path (str): Path to the image file of the button template.
+
+    Returns:
+        np.ndarray: Grayscale button template.
+
+    Raises:
+        FileNotFoundError: If the template cannot be read.
+    """
+    template = cv2.imread(path, cv2.IMREAD_GRAYSCALE) # return shape(height * width, y * x)
+    if template is None:
+        raise FileNotFoundError(f'The button template {path} cannot be read.')
+    return template
+
+@functools.lru_cache(maxsize=None)
+def _load_scaled_template(path: str, factor: float) -> np.ndarray:
+    """
+    Rescale a grayscale button template, once per process for every path and factor.
+
+    Args:
+        path (str): Path to the image file of the button template.
+        factor (float): Resize factor.
+
+    Returns:
+        np.ndarray: Rescaled grayscale template.
+    """
+    interpolation = cv2.INTER_AREA if factor < 1 else cv2.INTER_LINEAR
+    return cv2.resize(_load_template(path), None, fx=factor, fy=factor, interpolation=interpolation)
+
+@functools.lru_cache(maxsize=None)
+def _load_edged_template(path: str, factor: float) -> np.ndarray:
+    """
+    Rescale a button template and detect its edges, once per process for every path and factor.
+
+    The template is resized in grayscale and edge-detected afterwards, resizing a thin edge map washes it out.
+
+    Args:
+        path (str): Path to the image file of the button template.
+        factor (float): Resize factor.
+
+    Returns:
+        np.ndarray: Edge map of the rescaled template.
+    """
+    return cv2.Canny(_load_scaled_template(path, factor), 50, 200)
+
+@njit(parallel=True, cache=True)
+def _batch_peak_mask(spectra: np.ndarray, min_prominence: np.ndarray) -> np.ndarray:
+    """
+    Flag the peaks of many spectra at once, like scipy.signal.find_peaks with a prominence.
+
+    A peak is a local maximum, the middle sample of a flat top (rounded down) that drops on both
+    sides. Its prominence, its height above the higher of the lowest points between it and the
+    nearest higher sample on either side, has to reach the spectrum's minimum prominence.
+
+    Args:
+        spectra (np.ndarray): (n_spectra, n_wavelengths) intensities.
+        min_prominence (np.ndarray): (n_spectra,) minimum prominence of each spectrum.
+
+    Returns:
+        np.ndarray: (n_spectra, n_wavelengths) boolean mask of the peaks.
+    """
+    n_spectra, n = spectra.shape
+    mask = np.zeros((n_spectra, n), dtype=np.bool_)
+    for s in prange(n_spectra):
+        y = spectra[s]
+        i = 1
+        while i < n - 1:
+            if not y[i - 1] < y[i]:
+                i += 1
+                continue
+            # skip over a flat top, it is a peak only if it drops again after its last sample
+            i_ahead = i + 1
+            while i_ahead < n - 1 and y[i_ahead] == y[i]:
+                i_ahead += 1
+            if not y[i_ahead] < y[i]:
+                i = i_ahead
+                continue
+            peak = (i + i_ahead - 1) // 2
+            left_min = y[peak]
+            j = peak - 1
+            while j >= 0 and y[j] <= y[peak]:
+                left_min = min(left_min, y[j])
+                j -= 1
+            right_min = y[peak]
+            j = peak + 1
+            while j < n and y[j] <= y[peak]:
+                right_min = min(right_min, y[j])
+                j += 1
+            if y[peak] - max(left_min, right_min) >= min_prominence[s]:
+                mask[s, peak] = True
+            i = i_ahead + 1
+    return mask
+
+@njit(cache=True, fastmath=True)
+def _integrate_ranges(x: np.ndarray, y: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """
+    Integrate a spectrum over several wavelength bands above the straight baseline between the band limits.
+
+    Args:
+        x (np.ndarray): Sorted wavelengths.
+        y (np.ndarray): Intensities.
+        starts (np.ndarray): Lower limit of each band.
+        stops (np.ndarray): Upper limit of each band.
+
+    Returns:
+        np.ndarray: Trapezoidal area of each band, NaN for bands without any sample.
+    """
+    out = np.empty(len(starts), dtype=np.float64)
+    # a handful of bands, not worth a parallel launch
+    for k in range(len(starts)):
+        i = np.searchsorted(x, starts[k], side='left')
+        j = np.searchsorted(x, stops[k], side='right') - 1
+        if i > j:
+            out[k] = np.nan
+            continue
+        area = 0.0
+        for p in range(i, j):
+            area += 0.5 * (y[p] + y[p + 1]) * (x[p + 1] - x[p])
+        out[k] = area - 0.5 * (y[i] + y[j]) * (x[j] - x[i])
+    return out
+
+class ScreenPyramid:
+    """Grayscale image pyramid of a screenshot, level k is downscaled by 2**k.
+
+    The edge maps of the levels are detected on first use and shared by every button located in the screenshot.
+    """
+
+    def __init__(self, gray: np.ndarray, n_levels: int = 4) -> None:
+        """
+        Initialize the ScreenPyramid.
+
+        Args:
+            gray (np.ndarray): Grayscale screenshot at full resolution.
+            n_levels (int, optional): Number of levels including the full resolution. Defaults to 4.
+        """
+        self.levels = [gray]
+        for _ in range(n_levels - 1):
+            self.levels.append(cv2.pyrDown(self.levels[-1]))
+        self._edged: List[Optional[np.ndarray]] = [None] * n_levels
+
+    def edged(self, level: int) -> np.ndarray:
+        """
+        Get the Canny edge map of a level.
+
+        Args:
+            level (int): Level of the pyramid.
+
+        Returns:
+            np.ndarray: Edge map of the level.
+        """
+        if self._edged[level] is None:
+            self._edged[level] = cv2.Canny(self.levels[level], 50, 200)
+        return self._edged[level]
+
 class LIBSAnalyzer:
     """Base driver class for the SciAps Z300 LIBS analyzer based on GUI automation."""
 
+    # normalized correlation at which the scale sweep stops early
+    MATCH_EARLY_EXIT = 0.9
+    # normalized correlation below which a button is considered not visible
+    MATCH_MIN_CONFIDENCE = 0.5
+    # normalized correlation of the native scale grayscale match below which the scales are swept
+    MATCH_NATIVE_MIN = 0.85
+    # template scales of the sweep, those close to the native resolution are the most likely to match and come first
+    MATCH_SCALES = tuple(sorted((float(scale) for scale in np.linspace(0.5, 2.0, 10)), key=lambda scale: abs(np.log(scale))))
+    # seconds for which a screenshot and its pyramid are reused by the next button lookups
+    SCREEN_CACHE_TTL = 0.5
+
     def __init__(self, cache_folder_path: str, 
                  export_folder_path: str, 
                  measure_button_img_path: str = 'measure_button.png',
@@ -54,7 +371,9 @@ class LIBSAnalyzer:
                  delete_button_img_path: str = 'delete_button.png',
                  sync_button_img_path: str = 'sync_button.png',
                  time_out: float = 15.0,
-                 sleep_func: Callable[[float], None] = time.sleep) -> None:
+                 sleep_func: Callable[[float], None] = time.sleep,
+                 use_cuda: bool = False,
+                 use_opencl: bool = False) -> None:
         """
         Initialize the LIBSAnalyzer.
 
@@ -70,55 +389,59 @@ class LIBSAnalyzer:
             delete_button_img_path (str, optional): Path to the image of the delete button. Defaults to 'delete_button.png'.
             time_out (float, optional): Time out for operations. Defaults to 20.0.
             sleep_func (Callable, optional): Sleep function. Defaults to time.sleep.
+            use_cuda (bool, optional): Match button templates on a CUDA device when OpenCV has one available. Defaults to False.
+            use_opencl (bool, optional): Match button templates through OpenCV's OpenCL backend when no CUDA device
+                is used and an OpenCL device is available. Defaults to False.
         """
         self.cache_folder_path = cache_folder_path
         self.export_folder_path = export_folder_path
         self.time_out = time_out
         self.sleep_func = sleep_func
-        self.buttons = {
-            'measure': {
-                'pos': None,
-                'found': False,
-                'img_path': measure_button_img_path
-            },
-            'sample_name': {
-                'pos': None,
-                'found': False,
-                'img_path': sample_name_input_img_path
-            },
-            'export': {
-                'pos': None,
-                'found': False,
-                'img_path': export_button_img_path
-            },
-            'separate_spectrum': {
-                'pos': None,
-                'found': False,
-                'img_path': separate_spectrum_button_img_path
-            },
-            'new_folder': {
-                'pos': None,
-                'found': False,
-                'img_path': new_folder_button_img_path
-            },
-            'export_finish': {
-                'pos': None,
-                'found': False,
-                'img_path': export_finish_button_img_path
-            },
-            'delete': {
-                'pos': None,
-                'found': False,
-                'img_path': delete_button_img_path
-            },
-            'sync': {
-                'pos': None,
-                'found': False,
-                'img_path': sync_button_img_path
-            }
-        }
-        self.status = AnalyzerStatus.IDLE
+        self.use_cuda = use_cuda
+        self._cuda = None
+        self.use_opencl = use_opencl
+        self._opencl = None
+        # buttons are stored as parallel arrays indexed through self._button_idx
+        self.button_names = ('measure', 'sample_name', 'export', 'separate_spectrum',
+                             'new_folder', 'export_finish', 'delete', 'sync')
+        self._button_idx = {name: i for i, name in enumerate(self.button_names)}
+        self._button_paths = (measure_button_img_path, sample_name_input_img_path, export_button_img_path,
+                              separate_spectrum_button_img_path, new_folder_button_img_path,
+                              export_finish_button_img_path, delete_button_img_path, sync_button_img_path)
+        self._button_pos = np.zeros((len(self.button_names), 2), dtype=np.int32)
+        self._button_found = np.zeros(len(self.button_names), dtype=bool)
+        # search window (x0, y0, x1, y1) around the last known location, all zeros until found once
+        self._button_roi = np.zeros((len(self.button_names), 4), dtype=np.int32)
+        # scale of each button on the screen relative to its template, as last matched
+        self._button_scale = np.ones(len(self.button_names), dtype=np.float64)
+        # held for the whole duration of measure, export and analyze
+        self._lock = threading.Lock()
         self.sample_name = ''
+        # mss instances hold OS handles bound to the thread that created them
+        self._sct_local = threading.local()
+        # (time.monotonic() of the capture, pyramid) of the last screenshot, None once the GUI was touched
+        self._screen_cache: Optional[Tuple[float, ScreenPyramid]] = None
+        # one watchdog Observer for the lifetime of the analyzer, both folders stay watched between operations
+        self._observer = None
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.start()
+        self._cache_watcher = FolderWatcher(cache_folder_path, sleep_func, self._observer)
+        self._export_watcher = FolderWatcher(export_folder_path, sleep_func, self._observer)
+
+    def close(self) -> None:
+        """
+        Stop watching the cache and export folders.
+        """
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    @property
+    def status(self) -> AnalyzerStatus:
+        """AnalyzerStatus: RUNNING while an operation holds the device lock, IDLE otherwise."""
+        return AnalyzerStatus.RUNNING if self._lock.locked() else AnalyzerStatus.IDLE
 
     def measure(self) -> None:
         """
@@ -127,34 +450,30 @@ class LIBSAnalyzer:
         Raises:
             DeviceRunningError: If the analyzer is currently running.
         """
-        if self.status is not AnalyzerStatus.IDLE:
+        if not self._lock.acquire(blocking=False):
             raise DeviceRunningError('The analyzer is currently running. Please wait until it is done. The requested measurement operation cannot be performed.')
         else:
-            self.status = AnalyzerStatus.RUNNING
+            watcher = self._cache_watcher
             print('------------------------measurement started------------------------')
             try:
                 pyautogui.press('enter')
                 self.sleep_func(0.5)
-                n = len(os.listdir(self.cache_folder_path))
+                watcher.start()
                 self.press_a_button('measure')
                 print('measure button pressed')
             except Exception as e:
                 print(e)
                 raise
             else:
-                # check the number of files and folders in the cache folder
-                # if the number of files and folders increased, then the measurement is done
-                print(f'waiting for measurement to finish - {n}')
-                curr_t = time.time()
-                while len(os.listdir(self.cache_folder_path)) == n:
-                    self.sleep_func(0.2)
-                    elapsed = time.time() - curr_t
-                    print(f'elapsed time: {elapsed}')
-                    if elapsed > self.time_out:
-                        raise TimeOutError()
+                # a new file or folder in the cache folder means the measurement is done
+                print('waiting for measurement to finish')
+                watcher.wait(self.time_out)
                 print('------------------------measurement done------------------------')     
             finally:
-                self.status = AnalyzerStatus.IDLE
+                watcher.stop()
+                # the GUI changed, later lookups need a fresh screenshot
+                self._screen_cache = None
+                self._lock.release()
                 print('device status back to idle')
         
     def export(self) -> None:
@@ -164,38 +483,37 @@ class LIBSAnalyzer:
         Raises:
             DeviceRunningError: If the analyzer is currently running.
         """
-        if self.status is not AnalyzerStatus.IDLE:
+        if not self._lock.acquire(blocking=False):
             raise DeviceRunningError('The analyzer is currently running. Please wait until it is done. The requested export operation cannot be performed.')
         else:
-            self.status = AnalyzerStatus.RUNNING
             self.sample_name = self._name_after_time()
+            watcher = self._export_watcher
             print('------------------------export started------------------------')
             try:
-                n = len(os.listdir(self.export_folder_path))
-                # follow the steps below
+                watcher.start()
+                # follow the steps below, the inputs within one step are sent as one batch and
+                # the sleeps only give the GUI time to open dialogs
                 # 0. type in sample name
-                self.press_a_button('sample_name')
-                self.sleep_func(0.1)
-                pyautogui.typewrite(self.sample_name)
-                self.sleep_func(0.1)
                 # 1. press button already done
-                self.press_a_button('export')
+                (InputSequence()
+                    .click(*self.get_button_pos('sample_name'))
+                    .type(self.sample_name)
+                    .click(*self.get_button_pos('export'))
+                    .send())
                 print('export button pressed')
                 self.sleep_func(1.0)
                 # 2. type in directory and hit enter
-                pyautogui.typewrite(self.export_folder_path)
-                self.sleep_func(0.1)
-                pyautogui.press('enter')
+                InputSequence().type(self.export_folder_path).press('enter').send()
                 print('export folder path typed')
                 self.sleep_func(1.0)
                 # 3 choose save separate files
                 # choose save in a new folder
                 # hit export confirmation button
-                self.press_a_button('separate_spectrum')
-                self.sleep_func(0.1)
-                self.press_a_button('new_folder')
-                self.sleep_func(0.1)
-                self.press_a_button('export_finish')
+                (InputSequence()
+                    .click(*self.get_button_pos('separate_spectrum'))
+                    .click(*self.get_button_pos('new_folder'))
+                    .click(*self.get_button_pos('export_finish'))
+                    .send())
                 print('export confirmation button pressed')
                 self.sleep_func(0.5)
                 self.press_a_button('delete')
@@ -212,17 +530,14 @@ class LIBSAnalyzer:
                 print(e)
                 raise
             else:
-                print(f'waiting for export to finish - {n}')
-                curr_t = time.time()
-                while len(os.listdir(self.export_folder_path)) == n:
-                    self.sleep_func(0.2)
-                    elapsed = time.time() - curr_t
-                    print(f'elapsed time: {elapsed}')
-                    if elapsed > self.time_out:
-                        raise TimeOutError()
+                print('waiting for export to finish')
+                watcher.wait(self.time_out)
                 print('------------------------export done------------------------') 
             finally:
-                self.status = AnalyzerStatus.IDLE
+                watcher.stop()
+                # the GUI changed, later lookups need a fresh screenshot
+                self._screen_cache = None
+                self._lock.release()
                 print('device status back to idle')
     
     def analyze(self) -> List[float]:
@@ -234,21 +549,23 @@ class LIBSAnalyzer:
 
         Raises:
             DeviceRunningError: If the analyzer is currently running.
+            FileNotFoundError: If the exported spectrum of the last sample is missing.
         """
-        if self.status is not AnalyzerStatus.IDLE:
+        if not self._lock.acquire(blocking=False):
             raise DeviceRunningError('The analyzer is currently running. Please wait until it is done. The requested analysis operation cannot be performed.')
         else:
-            self.status = AnalyzerStatus.RUNNING
             print('------------------------analyzation started------------------------')
             try:
-                spec_path = ''
-                for f in os.listdir(self.export_folder_path + '/' + self.sample_name):
-                    if f.endswith('1.csv'):
-                        print(f)
-                        spec_path = self.export_folder_path + '/' + self.sample_name + '/' + f
-                        print(spec_path)
-                        break
-                
+                sample_dir = os.path.join(self.export_folder_path, self.sample_name)
+                spec_path = None
+                with os.scandir(sample_dir) as entries:
+                    for entry in entries:
+                        if entry.name.endswith('1.csv'):
+                            spec_path = entry.path
+                            print(spec_path)
+                            break
+                if spec_path is None:
+                    raise FileNotFoundError(f'No exported spectrum ending with 1.csv in {sample_dir}.')
                 res = self.find_all_peaks(spec_path)
             except Exception as e:
                 print(e)
@@ -257,7 +574,7 @@ class LIBSAnalyzer:
                 print('------------------------analyzation done------------------------')
                 return res
             finally:
-                self.status = AnalyzerStatus.IDLE
+                self._lock.release()
                 print('device status back to idle')
 
     def press_a_button(self, button_name: str) -> None:
@@ -271,12 +588,47 @@ class LIBSAnalyzer:
             UnkonwnButtonNameError: If the button name is unknown.
             ButtonNotFoundError: If the button is not found.
         """
-        if button_name not in self.buttons:
-            raise UnkonwnButtonNameError(f'The button name {button_name} is unknown.')
-        elif not self.buttons[button_name]['found']:
+        (x, y) = self.get_button_pos(button_name)
+        self._screen_cache = None
+        # the callers wait explicitly for the GUI after each click, skip pyautogui's PAUSE on top of that
+        pyautogui.click(x, y, _pause=False)
+
+    def get_button_pos(self, button_name: str) -> Tuple[int, int]:
+        """
+        Get the screen position of the button with the given name.
+
+        Args:
+            button_name (str): The name of the button.
+
+        Returns:
+            Tuple[int, int]: The (x, y) coordinates of the center of the button.
+
+        Raises:
+            UnkonwnButtonNameError: If the button name is unknown.
+            ButtonNotFoundError: If the button is not found.
+        """
+        i = self._button_index(button_name)
+        if not self._button_found[i]:
             raise ButtonNotFoundError(f'The button {button_name} was not found.')
-        else:
-            pyautogui.click(self.buttons[button_name]['pos'])
+        return int(self._button_pos[i, 0]), int(self._button_pos[i, 1])
+
+    def _button_index(self, button_name: str) -> int:
+        """
+        Get the index of the button with the given name in the button arrays.
+
+        Args:
+            button_name (str): The name of the button.
+
+        Returns:
+            int: Index of the button.
+
+        Raises:
+            UnkonwnButtonNameError: If the button name is unknown.
+        """
+        i = self._button_idx.get(button_name)
+        if i is None:
+            raise UnkonwnButtonNameError(f'The button name {button_name} is unknown.')
+        return i
 
     def _name_after_time(self) -> str:
         """
@@ -285,82 +637,395 @@ class LIBSAnalyzer:
         Returns:
             str: generated sample name.
         """
-        now = datetime.now()
-        year = now.year
-        month = now.month
-        day = now.day
-        hour = now.hour
-        minute = now.minute
-        second = now.second
-        
-        return f'{year}_{month:02}_{day:02}_{hour:02}_{minute:02}_{second:02}'
+        return time.strftime('%Y_%m_%d_%H_%M_%S')
 
-    def find_all_buttons(self) -> None:
+    def find_all_buttons(self, rescan: bool = False) -> None:
         """
         Find all buttons on the screen.
+
+        One screenshot and one image pyramid are shared by all buttons. The buttons that are found
+        are stored even if others are not.
+
+        Args:
+            rescan (bool): Search the whole screen even for buttons whose last location is known.
+
+        Raises:
+            ButtonNotFoundError: If any button is not visible on the screen, listing all of them.
+        """
+        (positions, errors) = self._locate_many(self.button_names, rescan)
+        for button, pos in positions.items():
+            i = self._button_idx[button]
+            self._button_pos[i] = pos
+            self._button_found[i] = True
+            print(f'{button} found in {pos}')
+        if errors:
+            raise ButtonNotFoundError(' '.join(errors.values()))
+
+    def _locate_many(self, button_names: Tuple[str, ...],
+                     rescan: bool = False) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, str]]:
+        """
+        Locate several buttons in a single screenshot.
+
+        The screenshot, its grayscale conversion, its image pyramid and the edge maps of the
+        pyramid levels are computed once and reused for every template.
+
+        Args:
+            button_names (Tuple[str, ...]): The names of the buttons to locate.
+            rescan (bool): Ignore the last known locations and search the whole screen.
+
+        Returns:
+            Tuple[Dict[str, Tuple[int, int]], Dict[str, str]]: The (x, y) coordinates of the center of
+                each button found, and the error message of each button not visible on the screen.
+
+        Raises:
+            UnkonwnButtonNameError: If a button name is unknown.
         """
-        for button in self.buttons:
-            self.buttons[button]['pos'] = self.locate_button_multi_scale(self.buttons[button]['img_path'])
-            self.buttons[button]['found'] = True
-            print(f'{button} found in {self.buttons[button]['pos']}')
+        screen = self._capture_screen()
+        positions = {}
+        errors = {}
+        for button in button_names:
+            try:
+                positions[button] = self.locate_button_in_screen(screen, button, rescan)
+            except ButtonNotFoundError as e:
+                print(e)
+                errors[button] = str(e)
+        return positions, errors
 
-    def locate_button_multi_scale(self, button_template_path: str) -> Tuple[int, int]:
+    def locate_button_multi_scale(self, button_name: str, rescan: bool = False) -> Tuple[int, int]:
         """
         Locate the button on the screen using multi-scale template matching.
 
         Args:
-            button_template_path (str): Path to the image file of the button template.
+            button_name (str): The name of the button to locate.
+            rescan (bool): Ignore the last known location and search the whole screen.
+
+        Returns:
+            Tuple[int, int]: The (x, y) coordinates of the center of the button.
+        """
+        return self.locate_button_in_screen(self._capture_screen(), button_name, rescan)
+
+    def _capture_screen(self) -> ScreenPyramid:
+        """
+        Take a screenshot and build its image pyramid.
+
+        Lookups following each other within SCREEN_CACHE_TTL share the screenshot, its pyramid and
+        its edge maps, unless the analyzer clicked or typed in between.
+
+        Returns:
+            ScreenPyramid: Image pyramid of the screenshot.
+        """
+        cached = self._screen_cache
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.SCREEN_CACHE_TTL:
+            return cached[1]
+        # mss returns the BGRA frame buffer of the primary monitor, which is converted to
+        # grayscale in a single pass without copying out the color channels first
+        sct = self._screen_grabber()
+        screenshot = np.asarray(sct.grab(sct.monitors[1]))
+        screen = ScreenPyramid(cv2.cvtColor(screenshot, cv2.COLOR_BGRA2GRAY))
+        self._screen_cache = (now, screen)
+        return screen
+
+    def _screen_grabber(self) -> mss.base.MSSBase:
+        """
+        Get the mss screen grabber of the calling thread, creating it on first use.
+
+        Returns:
+            mss.base.MSSBase: Screen grabber owned by the calling thread.
+        """
+        sct = getattr(self._sct_local, 'sct', None)
+        if sct is None:
+            sct = self._sct_local.sct = mss.mss()
+        return sct
+
+    def _cuda_available(self) -> bool:
+        """
+        Check whether template matching runs on a CUDA device, probing OpenCV on first use.
+
+        Returns:
+            bool: True if use_cuda is set and OpenCV was built with CUDA and sees a device.
+        """
+        if self._cuda is None:
+            self._cuda = self.use_cuda and hasattr(cv2, 'cuda') and cv2.cuda.getCudaEnabledDeviceCount() > 0
+            print(f'template matching on {"CUDA" if self._cuda else "CPU"}')
+        return self._cuda
+
+    def _opencl_available(self) -> bool:
+        """
+        Check whether template matching runs through OpenCL, probing OpenCV on first use.
+
+        Returns:
+            bool: True if use_opencl is set and OpenCV sees an OpenCL device.
+        """
+        if self._opencl is None:
+            self._opencl = self.use_opencl and cv2.ocl.haveOpenCL()
+            if self._opencl:
+                cv2.ocl.setUseOpenCL(True)
+                print(f'template matching through OpenCL on {cv2.ocl.Device.getDefault().name()}')
+        return self._opencl
+
+    def locate_button_in_screen(self, screen: ScreenPyramid, button_name: str, rescan: bool = False) -> Tuple[int, int]:
+        """
+        Locate the button in the image pyramid of a screenshot.
+
+        Buttons do not move within a session, so once a button has been found only a window of
+        four times its width and height, centered on the last location, is searched for the template
+        at the scale it was last matched at. The whole screen is searched again if the button does not
+        match strongly in that window or if rescan is set.
+
+        Args:
+            screen (ScreenPyramid): Image pyramid returned by _capture_screen.
+            button_name (str): The name of the button to locate.
+            rescan (bool): Ignore the last known location and search the whole screen.
 
         Returns:
             Tuple[int, int]: The (x, y) coordinates of the center of the button.
+
+        Raises:
+            UnkonwnButtonNameError: If the button name is unknown.
+            ButtonNotFoundError: If the button is not visible on the screen.
         """
-        screenshot = np.array(pyautogui.screenshot())
-        gray = cv2.cvtColor(screenshot, cv2.COLOR_RGB2GRAY)
+        i = self._button_index(button_name)
+        box = None
+        (screen_height, screen_width) = screen.levels[0].shape[:2]
+        (x0, y0, x1, y1) = self._button_roi[i].tolist()
+        # the window may be unset, or stored for a larger screen before the display resolution changed
+        if not rescan and x0 < x1 <= screen_width and y0 < y1 <= screen_height:
+            # a weak match in the small window is more likely another control than the button,
+            # and sweeping the scales there would accept it, so only a strong match at the last scale counts
+            scale = self._button_scale[i].item()
+            found = self._locate_native(ScreenPyramid(screen.levels[0][y0:y1, x0:x1]), self._button_paths[i], scale)
+            if found is not None and found[0] >= self.MATCH_NATIVE_MIN:
+                box = found[1:] + (scale,)
+            else:
+                print(f'{button_name} moved away from its last location, searching the whole screen')
+        if box is None:
+            (x0, y0) = (0, 0)
+            box = self._locate_in_pyramid(screen, button_name)
+        (x, y, width, height, self._button_scale[i]) = box
+        (cx, cy) = (x0 + x + width // 2, y0 + y + height // 2)
+        # the origin is aligned to the coarsest level so the pyramid of the crop matches the full one
+        align = 2 ** (len(screen.levels) - 1)
+        self._button_roi[i] = (max(cx - 2 * width, 0) // align * align, max(cy - 2 * height, 0) // align * align,
+                               min(cx + 2 * width, screen_width), min(cy + 2 * height, screen_height))
+        return cx, cy
+
+    def _locate_in_pyramid(self, screen: ScreenPyramid, button_name: str) -> Tuple[int, int, int, int, float]:
+        """
+        Find the bounding box of the button in an image pyramid.
+
+        The buttons are drawn at the resolution the templates were captured at, so the grayscale
+        template is matched at its native scale first. Only if that match is weak, e.g. after the
+        display scaling changed, the edge maps are swept over a range of scales to find the scale
+        of the button, which is then located by the grayscale template at that scale.
 
-        template = cv2.imread(button_template_path, cv2.IMREAD_GRAYSCALE) # return shape(height * width, y * x)
-        template = cv2.Canny(template, 50, 200)
-        (template_height, template_width) = template.shape[:2]
+        Args:
+            screen (ScreenPyramid): Image pyramid of the screenshot or of a part of it.
+            button_name (str): The name of the button to locate.
+
+        Returns:
+            Tuple[int, int, int, int, float]: The (x, y, width, height) of the button at full resolution,
+                and its scale relative to the template.
+
+        Raises:
+            ButtonNotFoundError: If the button is not visible in the image.
+        """
+        path = self._button_paths[self._button_idx[button_name]]
+        scale = 1.0
+        found = self._locate_native(screen, path)
+        if found is None or found[0] < self.MATCH_NATIVE_MIN:
+            scale = self._match_scales(screen, path, button_name)
+            # the edge maps of equally sized buttons look alike, the grayscale template tells them apart
+            found = self._refine(screen, path, self._match_native(screen, path, level=0, scale=scale))
+            if found[0] < self.MATCH_MIN_CONFIDENCE:
+                raise ButtonNotFoundError(f'The button {button_name} is not visible on the screen, best correlation {found[0]:.2f}.')
+        (_, x, y, width, height) = found
+        return x, y, width, height, scale
+
+    def _locate_native(self, screen: ScreenPyramid, template_path: str,
+                       scale: float = 1.0) -> Optional[Tuple[float, int, int, int, int]]:
+        """
+        Locate the grayscale template at a known scale and verify the match at full resolution.
+
+        On a coarse level the labels of look-alike buttons blur into the same box, so a coarse match
+        whose refined correlation stays below MATCH_NATIVE_MIN is repeated on the full-resolution screen.
+
+        Args:
+            screen (ScreenPyramid): Image pyramid of the screenshot or of a part of it.
+            template_path (str): Path to the image file of the button template.
+            scale (float, optional): Scale of the buttons on the screen relative to the template.
+                Defaults to 1.0, the native scale.
+
+        Returns:
+            Optional[Tuple[float, int, int, int, int]]: Same as _refine, or None if the template
+                does not fit on the screen.
+        """
+        found = self._match_native(screen, template_path, scale=scale)
+        if found is None:
+            return None
+        refined = self._refine(screen, template_path, found)
+        if refined[0] < self.MATCH_NATIVE_MIN and found[3] > 0:
+            full = self._refine(screen, template_path, self._match_native(screen, template_path, level=0, scale=scale))
+            refined = max(refined, full)
+        return refined
+
+    def _refine(self, screen: ScreenPyramid, template_path: str,
+                found: Tuple[float, Tuple[int, int], float, int, Tuple[int, int]]) -> Tuple[float, int, int, int, int]:
+        """
+        Refine a match on a coarse pyramid level down to full resolution.
+
+        The match is repeated on each finer level within a small window around the upscaled
+        location, so the full-resolution screen is never matched as a whole.
+
+        Args:
+            screen (ScreenPyramid): Image pyramid the match was found in.
+            template_path (str): Path to the image file of the button template.
+            found (Tuple[float, Tuple[int, int], float, int, Tuple[int, int]]): Match as returned by
+                _match_native.
+
+        Returns:
+            Tuple[float, int, int, int, int]: The correlation value at the finest level matched, and
+                the (x, y, width, height) of the button at full resolution.
+        """
+        (max_val, (x, y), scale, level, (height, width)) = found
+        while level > 0:
+            level -= 1
+            template = _load_scaled_template(template_path, scale / 2 ** level)
+            (height, width) = template.shape[:2]
+            gray = screen.levels[level]
+            # the location found one level up is accurate to about a pixel there
+            pad = 4 + max(height, width) // 8
+            (x0, y0) = (max(2 * x - pad, 0), max(2 * y - pad, 0))
+            (x1, y1) = (min(2 * x + width + pad, gray.shape[1]), min(2 * y + height + pad, gray.shape[0]))
+            if y1 - y0 < height or x1 - x0 < width:
+                (x, y) = (2 * x, 2 * y)
+                continue
+            result = cv2.matchTemplate(gray[y0:y1, x0:x1], template, cv2.TM_CCOEFF_NORMED)
+            (_, max_val, _, (dx, dy)) = cv2.minMaxLoc(result)
+            (x, y) = (x0 + dx, y0 + dy)
+        return max_val, x, y, width, height
+
+    def _match_native(self, screen: ScreenPyramid, template_path: str, level: Optional[int] = None,
+                      scale: float = 1.0) -> Optional[Tuple[float, Tuple[int, int], float, int, Tuple[int, int]]]:
+        """
+        Match the grayscale template at its native scale in the image pyramid of a screenshot.
+
+        Args:
+            screen (ScreenPyramid): Image pyramid of the screenshot.
+            template_path (str): Path to the image file of the button template.
+            level (int, optional): Pyramid level to match on. Defaults to the coarsest level at which
+                the template keeps 24 pixels on its short side.
+            scale (float, optional): Scale of the buttons on the screen relative to the template,
+                as found by _match_scales. Defaults to 1.0.
+
+        Returns:
+            Optional[Tuple[float, Tuple[int, int], float, int, Tuple[int, int]]]: The correlation value, the
+                top-left corner of the match on its level, the scale, the level and the (height, width) of
+                the rescaled template on that level, or None if the template does not fit on the screen.
+        """
+        if level is None:
+            # below 24 pixels the labels blur, and equally sized buttons match each other
+            template = _load_template(template_path)
+            level = 0
+            while level + 1 < len(screen.levels) and min(template.shape[:2]) * scale / 2 ** (level + 1) >= 24:
+                level += 1
+        template = _load_scaled_template(template_path, scale / 2 ** level)
+        gray = screen.levels[level]
+        if template.shape[0] > gray.shape[0] or template.shape[1] > gray.shape[1]:
+            return None
+        (_, max_val, _, max_loc) = cv2.minMaxLoc(cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED))
+        return max_val, max_loc, scale, level, template.shape[:2]
+
+    def _match_scales(self, screen: ScreenPyramid, template_path: str, button_name: str) -> float:
+        """
+        Find the scale of the buttons on a screenshot by sweeping the edge map of a template over a range of scales.
+
+        The sweep runs on the full-resolution edge map, on coarser levels the edges of the
+        downscaled templates are too thin to tell the buttons apart.
+
+        Args:
+            screen (ScreenPyramid): Image pyramid of the screenshot.
+            template_path (str): Path to the image file of the button template.
+            button_name (str): The name of the button, used in error messages.
+
+        Returns:
+            float: The scale of the buttons on the screen relative to the template.
+
+        Raises:
+            ButtonNotFoundError: If the template does not fit on the screen at any scale or
+                matches nowhere with enough confidence.
+        """
+        scales = self.MATCH_SCALES
+        # detect the edges up front instead of racing in the workers
+        edged_screen = screen.edged(0)
+
+        if self._cuda_available():
+            # the screen is uploaded once, only the small templates are uploaded per scale and
+            # only the scalar result of minMaxLoc is downloaded
+            screen_gpu = cv2.cuda_GpuMat()
+            screen_gpu.upload(edged_screen)
+            matcher = cv2.cuda.createTemplateMatching(cv2.CV_8U, cv2.TM_CCOEFF_NORMED)
+
+            def _match(template_edged: np.ndarray) -> Tuple[float, float, Tuple[int, int], Tuple[int, int]]:
+                template_gpu = cv2.cuda_GpuMat()
+                template_gpu.upload(template_edged)
+                return cv2.cuda.minMaxLoc(matcher.match(screen_gpu, template_gpu))
+            # the device serializes the work anyway
+            max_workers = 1
+        elif self._opencl_available():
+            # matchTemplate and minMaxLoc run as OpenCL kernels on UMat inputs, the screen is uploaded once
+            screen_umat = cv2.UMat(edged_screen)
+
+            def _match(template_edged: np.ndarray) -> Tuple[float, float, Tuple[int, int], Tuple[int, int]]:
+                return cv2.minMaxLoc(cv2.matchTemplate(screen_umat, cv2.UMat(template_edged), cv2.TM_CCOEFF_NORMED))
+            max_workers = 1
+        else:
+            def _match(template_edged: np.ndarray) -> Tuple[float, float, Tuple[int, int], Tuple[int, int]]:
+                return cv2.minMaxLoc(cv2.matchTemplate(edged_screen, template_edged, cv2.TM_CCOEFF_NORMED))
+            # leave half of the cores to OpenCV's own threads and the server's event loop
+            max_workers = max(1, (os.cpu_count() or 2) // 2)
+
+        def _match_at_scale(scale: float) -> Optional[Tuple[float, float]]:
+            template_edged = _load_edged_template(template_path, scale)
+            # skip the scales at which the template does not fit on the screen or
+            # is too small to keep any structure
+            if template_edged.shape[0] > edged_screen.shape[0] or template_edged.shape[1] > edged_screen.shape[1]:
+                return None
+            if min(template_edged.shape[:2]) < 8:
+                return None
+            (_, max_val, _, _) = _match(template_edged)
+            return max_val, scale
 
         found = None
-        # loop over the scales of the image
-        for scale in np.linspace(0.2, 2.0, 10)[::-1]:
-            # resize the image according to the scale, and keep track
-            # of the ratio of the resizing
-            resized = imutils.resize(gray, width = int(gray.shape[1] * scale))
-            r = gray.shape[1] / float(resized.shape[1])
-            # if the resized image is smaller than the template, then break
-            # from the loop
-            if resized.shape[0] < template_height or resized.shape[1] < template_width:
-                break
-            
-            # detect edges in the resized, grayscale image and apply template
-            # matching to find the template in the image
-            edged = cv2.Canny(resized, 50, 200)
-            result = cv2.matchTemplate(edged, template, cv2.TM_CCOEFF)
-            (_, max_val, _, max_loc) = cv2.minMaxLoc(result)
-            # # check to see if the iteration should be visualized
-            # if args.get("visualize", False):
-            #     # draw a bounding box around the detected region
-            #     clone = np.dstack([edged, edged, edged])
-            #     cv2.rectangle(clone, (max_loc[0], max_loc[1]),
-            #         (max_loc[0] + template_width, max_loc[1] + template_height), (0, 0, 255), 2)
-            #     cv2.imshow("Visualize", clone)
-            #     cv2.waitKey(0)
-            # if we have found a new maximum correlation value, then update
-            # the bookkeeping variable
-            if found is None or max_val > found[0]:
-                found = (max_val, max_loc, r)
-        # unpack the bookkeeping variable and compute the (x, y) coordinates
-        # of the bounding box based on the resized ratio
-        (_, max_loc, r) = found
-        (start_x, start_y) = (int(max_loc[0] * r), int(max_loc[1] * r))
-        (end_x, end_y) = (int((max_loc[0] + template_width) * r), int((max_loc[1] + template_height) * r))
-        
-        # draw a bounding box around the detected result and display the image
-        # cv2.rectangle(screenshot, (start_x, start_y), (end_x, end_y), (0, 0, 255), 2)
-        # cv2.imshow("Image", screenshot)
-        # cv2.waitKey(0)
-        return (start_x + end_x) // 2, (start_y + end_y) // 2
+        # the scales are independent and OpenCV releases the GIL in resize and
+        # matchTemplate, so they are matched concurrently
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_match_at_scale, scale) for scale in scales]
+            for future in as_completed(futures):
+                res = future.result()
+                # keep the scale with the maximum correlation value
+                if res is not None and (found is None or res[0] > found[0]):
+                    found = res
+                # a near-perfect match cannot be beaten, skip the scales not started yet
+                if found is not None and found[0] >= self.MATCH_EARLY_EXIT:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        if found is None:
+            raise ButtonNotFoundError(f'The button template of {button_name} does not fit on the screen at any scale.')
+        if found[0] < self.MATCH_MIN_CONFIDENCE:
+            raise ButtonNotFoundError(f'The button {button_name} is not visible on the screen, best correlation {found[0]:.2f}.')
+        return found[1]
+
+    def warm_up(self) -> None:
+        """
+        Compile the numba kernel of analyze, or load it from the on-disk cache, so the first
+        analyze call does not pay for it.
+        """
+        axis = np.arange(3, dtype=np.float32)
+        # read-only like the columns returned by _load_spectrum, or numba compiles another signature
+        axis.setflags(write=False)
+        _integrate_ranges(axis, axis, axis[:1].copy(), axis[2:].copy())
 
     def find_all_peaks(self, csv_file_path: str) -> List[float]:
         """
@@ -373,18 +1038,73 @@ class LIBSAnalyzer:
             List[float]: A list of detected peaks.
         """
         # todo: naive implementation for now
-        df = pd.read_csv(csv_file_path, header=0)
-        x = df['wavelength'].to_numpy(dtype=float)
-        y = df['intensity'].to_numpy(dtype=float)
+        x, y = self._load_spectrum(csv_file_path)
 
         ranges = [(669.0, 673.0)]
+        # the wavelength axis is sorted by _load_spectrum
+        (starts, stops) = np.array(ranges, dtype=x.dtype).T
         areas = {}
-        for start, stop in ranges:
-            
-            start_idx = np.where(x >= start)[0][0]
-            stop_idx = np.where(x <= stop)[0][-1]
+        for (start, stop), area in zip(ranges, _integrate_ranges(x, y, starts.copy(), stops.copy())):
+            if not np.isnan(area):
+                areas[f'{start} - {stop}'] = float(area)
+
+        return areas
+
+    def find_peak_wavelengths(self, csv_file_path: str, prominence: Optional[float] = None) -> List[float]:
+        """
+        Detect the emission peaks in the given CSV file.
+
+        Args:
+            csv_file_path (str): Path to the CSV file.
+            prominence (float, optional): Minimum prominence of a peak. Defaults to three times
+                the standard deviation of the intensity.
+
+        Returns:
+            List[float]: Wavelengths of the detected peaks.
+        """
+        x, y = self._load_spectrum(csv_file_path)
+        peaks = self.find_peaks_batch(y[np.newaxis, :], prominence)[0]
+        return x[peaks].tolist()
 
-            area = np.trapezoid(y[start_idx:stop_idx+1], x[start_idx:stop_idx+1]) - (y[start_idx] + y[stop_idx]) * (x[stop_idx] - x[start_idx]) / 2
-            areas[f'{start} - {stop}'] = area
+    def find_peaks_batch(self, spectra: np.ndarray, prominence: Optional[float] = None) -> List[np.ndarray]:
+        """
+        Detect the peaks of many spectra sharing the same wavelength axis.
+
+        Args:
+            spectra (np.ndarray): (n_spectra, n_wavelengths) intensities.
+            prominence (float, optional): Minimum prominence of a peak. Defaults to three times
+                the standard deviation of each spectrum.
+
+        Returns:
+            List[np.ndarray]: Indices of the peaks of each spectrum.
+        """
+        spectra = np.ascontiguousarray(spectra, dtype=np.float32)
+        if prominence is None:
+            min_prominence = 3 * spectra.std(axis=1)
+        else:
+            min_prominence = np.full(spectra.shape[0], prominence, dtype=np.float32)
+        mask = _batch_peak_mask(spectra, min_prominence.astype(np.float32))
+        return [np.flatnonzero(row) for row in mask]
 
-        return areas
\ No newline at end of file
+    def _load_spectrum(self, csv_file_path: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load a spectrum exported by Profile Builder.
+
+        Args:
+            csv_file_path (str): Path to the CSV file.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The wavelength and intensity columns, sorted by wavelength.
+        """
+        # parse only the two numeric columns, straight to float32 without type inference
+        df = pd.read_csv(csv_file_path, header=0, usecols=['wavelength', 'intensity'], dtype=np.float32, engine='c')
+        x = df['wavelength'].to_numpy()
+        y = df['intensity'].to_numpy()
+        if np.any(np.diff(x) < 0):
+            order = np.argsort(x, kind='stable')
+            (x, y) = (x[order], y[order])
+        # pandas hands out read-only views under copy-on-write, the sorted copies are writable;
+        # numba compiles a separate signature for each, so warm_up could only cover one of them
+        x.setflags(write=False)
+        y.setflags(write=False)
+        return x, y
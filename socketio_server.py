@@ -1,17 +1,7 @@
-from calendar import TUESDAY
-from typing import override
-import os
+import asyncio
 import socketio
-import pyautogui
-import cv2
-import numpy as np
-import imutils
-import eventlet
-from pyvda import AppView, get_apps_by_z_order, VirtualDesktop, get_virtual_desktops
-from enum import Enum
-import time
-import threading
-from libs_analyzer import LIBSAnalyzer, AnalyzerStatus, DeviceRunningError, TimeOutError, ButtonNotFoundError, UnkonwnButtonNameError
+import uvicorn
+from libs_analyzer import LIBSAnalyzer, AnalyzerStatus
 
 class Z300SocketIOServer(LIBSAnalyzer):
     """
@@ -30,12 +20,13 @@ class Z300SocketIOServer(LIBSAnalyzer):
                  sync_button_img_path,
                  time_out):
         
-        self.sio = socketio.Server(cors_allowed_origins='*', async_mode='eventlet')
-        self.app = socketio.WSGIApp(self.sio)
+        self.sio = socketio.AsyncServer(cors_allowed_origins='*', async_mode='asgi')
+        self.app = socketio.ASGIApp(self.sio, on_startup=self.on_startup, on_shutdown=self.close)
 
+        # the blocking analyzer operations run on worker threads, so they sleep with time.sleep
         super().__init__(cache_folder_path, export_folder_path, measure_button_img_path, sample_name_input_img_path,
                          export_button_img_path, separate_spectrum_button_img_path, new_folder_button_img_path, 
-                         export_finish_button_img_path, delete_button_img_path, sync_button_img_path, time_out, sleep_func=self.sio.sleep)
+                         export_finish_button_img_path, delete_button_img_path, sync_button_img_path, time_out)
         
         # self.libs_analyzer = LIBSAnalyzer(cache_folder_path='C:/Users/LIBS_VM/sciaps/cache', export_folder_path='Y:/')
         
@@ -48,146 +39,95 @@ class Z300SocketIOServer(LIBSAnalyzer):
         self.sio.on('analyze', self.on_analyze)
         self.sio.on('find_buttons', self.on_find_buttons)
 
-    # @override
-    # def measure(self):
-    #     """
-    #     Perform a measurement operation.
-
-    #     Raises:
-    #         DeviceRunningError: If the analyzer is currently running.
-    #     """
-    #     if self.status is not AnalyzerStatus.IDLE:
-    #         raise DeviceRunningError('The analyzer is currently running. Please wait until it is done. The requested measurement operation cannot be performed.')
-    #     else:
-    #         self.status = AnalyzerStatus.RUNNING
-    #         print('------------------------measurement started------------------------')
-    #         try:
-    #             n = len(os.listdir(self.cache_folder_path))
-    #             self.press_a_button('measure')
-    #             print('measure button pressed')  
-    #         except Exception as e:
-    #             print(e)
-    #             raise
-    #         else:
-    #             # check the number of files and folders in the cache folder
-    #             # if the number of files and folders increased, then the measurement is done
-    #             print(f'waiting for measurement to finish - {n}')
-    #             curr_t = time.time()
-    #             while len(os.listdir(self.cache_folder_path)) == n:
-    #                 self.sio.sleep(0.2)
-    #                 elapsed = time.time() - curr_t
-    #                 print(f'elapsed time: {elapsed}')
-    #                 if elapsed > self.time_out:
-    #                     raise TimeOutError()
-    #             print('------------------------measurement done------------------------')    
-    #         finally:
-    #             self.status = AnalyzerStatus.IDLE
-    #             print('device back to idle')
-    
-    # @override
-    # def export(self) -> None:
-    #     """
-    #     Perform an export operation.
-
-    #     Raises:
-    #         DeviceRunningError: If the analyzer is currently running.
-    #     """
-    #     if self.status is not AnalyzerStatus.IDLE:
-    #         raise DeviceRunningError('The analyzer is currently running. Please wait until it is done. The requested export operation cannot be performed.')
-    #     else:
-    #         self.status = AnalyzerStatus.RUNNING
-    #         self.sample_name = self._name_after_time()
-    #         try:
-    #             n = len(os.listdir(self.export_folder_path))
-    #             # follow the steps below
-    #             # 0. type in sample name
-    #             self.press_a_button('sample_name')
-    #             pyautogui.typewrite(self.sample_name)
-    #             # 1. press button already done
-    #             self.press_a_button('export')
-    #             print('export button pressed')
-    #             self.sio.sleep(2.0)
-    #             # 2. type in directory and hit enter
-    #             pyautogui.typewrite(self.export_folder_path)
-    #             pyautogui.press('enter')
-    #             print('export folder path typed')
-    #             self.sio.sleep(2.0)
-    #             # 3 choose save separate files
-    #             # choose save in a new folder
-    #             # hit export confirmation button
-    #             self.press_a_button('separate_spectrum')
-    #             self.press_a_button('new_folder')
-    #             self.press_a_button('export_finish')
-    #             print('export confirmation button pressed')
-    #         except Exception as e:
-    #             print(e)
-    #             raise
-    #         else:
-    #             print(f'waiting for export to finish - {n}')
-    #             curr_t = time.time()
-    #             while len(os.listdir(self.export_folder_path)) == n:
-    #                 self.sio.sleep(0.2)
-    #                 elapsed = time.time() - curr_t
-    #                 print(f'elapsed time: {elapsed}')
-    #                 if elapsed > self.time_out:
-    #                     raise TimeOutError()
-    #             print('export done') 
-    #         finally:
-    #             self.status = AnalyzerStatus.IDLE
-    #             print('device back to idle')
-
-    def on_connect(self, sid, environ, auth):
+    async def run_blocking(self, func, *args):
+        """
+        Run a blocking analyzer operation on the default thread pool.
+
+        GUI automation, screenshots and OpenCV calls would otherwise block the event loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def run_operation(self, func):
+        """
+        Run measure, export or analyze with run_blocking, broadcasting the status when it starts and ends.
+
+        These are the only operations that change the status, so the clients see every change
+        without the status being polled.
+        """
+        await self.sio.emit('status', AnalyzerStatus.RUNNING.name)
+        try:
+            return await self.run_blocking(func)
+        finally:
+            await self.sio.emit('status', self.status.name)
+
+    def on_startup(self):
+        self.sio.start_background_task(self.update_status)
+        self.sio.start_background_task(self.run_blocking, self.warm_up)
+
+    async def on_connect(self, sid, environ, auth):
         print('connect ', sid)
+        # status updates are only broadcast on change, a new client gets the current one right away
+        await self.sio.emit('status', self.status.name, to=sid)
 
-    def on_disconnect(self, sid):
+    async def on_disconnect(self, sid):
         print('disconnect ', sid)
 
-    def on_measure(self, sid, data):
+    async def on_measure(self, sid, data):
         if self.status == AnalyzerStatus.RUNNING:
             return 'The analyzer is currently running. Please wait until it is done.'
         else:
             try:
-                self.measure()
+                await self.run_operation(self.measure)
             except Exception as e:
                 print(e)
                 return str(e)
             else:
                 return 'success'
     
-    def on_export(self, sid, data):
+    async def on_export(self, sid, data):
         if self.status == AnalyzerStatus.RUNNING:
             return 'The analyzer is currently running. Please wait until it is done.'
         else:
             try:
-                self.export()
+                await self.run_operation(self.export)
             except Exception as e:
                 print(e)
                 return str(e)
             else:
                 return 'success'
     
-    def on_analyze(self, sid, data):
+    async def on_analyze(self, sid, data):
         if self.status == AnalyzerStatus.RUNNING:
             return 'The analyzer is currently running. Please wait until it is done.'
         else:
             try:
-                res = self.analyze()
+                res = await self.run_operation(self.analyze)
             except Exception as e:
                 return str(e), {'not_found': 0.0}
             else:
                 return 'success', res 
 
-    def on_find_buttons(self, sid, data):
-        self.find_all_buttons()
-        return [self.buttons[button]['pos'] for button in self.buttons]
+    async def on_find_buttons(self, sid, data):
+        try:
+            await self.run_blocking(self.find_all_buttons)
+        except Exception as e:
+            print(e)
+            return str(e)
+        else:
+            return [self.get_button_pos(button) for button in self.button_names]
     # def on_set_desktop_id(self, sid, data):
     #     self.desktop_id = data
     #     print(f'Virtual desktop id for Profile Builder has been set to {self.desktop_id}.')
 
-    def update_status(self):
+    async def update_status(self):
+        """
+        Broadcast the analyzer status every 5 seconds as a heartbeat.
+
+        The changes are broadcast by run_operation as they happen.
+        """
         while True:
-            self.sio.sleep(0.5)
-            self.sio.emit('status', self.status.name)
+            await self.sio.emit('status', self.status.name)
+            await self.sio.sleep(5.0)
         
 
 if __name__ == '__main__':
@@ -202,7 +142,6 @@ if __name__ == '__main__':
                                          delete_button_img_path='button_templates/delete_button.png',
                                          sync_button_img_path='button_templates/sync_button.png',
                                          time_out=15.0)
-    z300_web_server.sio.start_background_task(z300_web_server.update_status)
-    eventlet.wsgi.server(eventlet.listen(('', 1234)), z300_web_server.app)
+    uvicorn.run(z300_web_server.app, host='0.0.0.0', port=1234)
 
 
@@ -0,0 +1,23 @@
+import os
+
+import libs_analyzer
+from libs_analyzer import FolderWatcher
+
+
+def test_polling_finds_entry_behind_unchanged_mtime(tmp_path, monkeypatch):
+    monkeypatch.setattr(libs_analyzer, 'Observer', None)
+    ticks = []
+
+    def sleep(seconds):
+        # the first tick creates an entry, as on FAT or SMB the folder keeps its modification time
+        if not ticks:
+            st = os.stat(tmp_path)
+            (tmp_path / 'spectrum.csv').touch()
+            os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        ticks.append(seconds)
+
+    watcher = FolderWatcher(str(tmp_path), sleep)
+    watcher.start()
+    watcher.wait(60.0)
+    watcher.stop()
+    assert len(ticks) <= FolderWatcher.RESCAN_TICKS
@@ -0,0 +1,157 @@
+import cv2
+import numpy as np
+import pytest
+
+from libs_analyzer import LIBSAnalyzer, ButtonNotFoundError
+
+# label, top-left corner and size of every button on the synthetic 1920x1080 screen
+BUTTONS = {
+    'measure': ('Measure', (700, 500), (140, 44)),
+    'sample_name': ('Sample name', (200, 120), (180, 36)),
+    'export': ('Export', (1400, 640), (110, 40)),
+    'separate_spectrum': ('Separate files', (420, 820), (190, 36)),
+    'new_folder': ('New folder', (980, 300), (150, 36)),
+    'export_finish': ('Finish', (1250, 900), (100, 40)),
+    'delete': ('Delete', (150, 600), (110, 40)),
+    'sync': ('Sync', (1600, 200), (90, 36)),
+}
+
+
+def draw_screen(offset=(0, 0), hidden=()):
+    """Draw the synthetic screen in BGRA, the buttons shifted by offset, returns it with the button centers."""
+    rng = np.random.default_rng(0)
+    screen = np.full((1080, 1920, 3), 230, np.uint8)
+    # clutter of other controls
+    for i in range(40):
+        (x, y) = (int(rng.integers(0, 1800)), int(rng.integers(0, 1040)))
+        cv2.rectangle(screen, (x, y), (x + 100, y + 30), (80, 80, 80), 2)
+        cv2.putText(screen, f'B{i}', (x + 10, y + 22), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+    centers = {}
+    for name, (label, (x, y), (w, h)) in BUTTONS.items():
+        (x, y) = (x + offset[0], y + offset[1])
+        centers[name] = (x + w // 2, y + h // 2)
+        if name in hidden:
+            continue
+        cv2.rectangle(screen, (x, y), (x + w, y + h), (255, 255, 255), -1)
+        cv2.rectangle(screen, (x, y), (x + w, y + h), (20, 20, 20), 2)
+        cv2.putText(screen, label, (x + 8, y + h - 12), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+    return cv2.cvtColor(screen, cv2.COLOR_BGR2BGRA), centers
+
+
+def scale_screen(screen, centers, factor):
+    """Emulate a different display scaling by resizing the whole screen."""
+    interpolation = cv2.INTER_AREA if factor < 1 else cv2.INTER_LINEAR
+    scaled = cv2.resize(screen, None, fx=factor, fy=factor, interpolation=interpolation)
+    return scaled, {name: (round(x * factor), round(y * factor)) for name, (x, y) in centers.items()}
+
+
+class FakeGrabber:
+    """Stands in for mss, grab returns the current synthetic frame."""
+    monitors = [{}, {}]
+
+    def __init__(self):
+        self.frame = None
+
+    def grab(self, monitor):
+        return self.frame
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    (screen, _) = draw_screen()
+    paths = {}
+    for name, (_, (x, y), (w, h)) in BUTTONS.items():
+        paths[name] = str(tmp_path / f'{name}.png')
+        cv2.imwrite(paths[name], screen[y - 4:y + h + 5, x - 4:x + w + 5])
+    analyzer = LIBSAnalyzer(str(tmp_path), str(tmp_path),
+                            measure_button_img_path=paths['measure'],
+                            sample_name_input_img_path=paths['sample_name'],
+                            export_button_img_path=paths['export'],
+                            separate_spectrum_button_img_path=paths['separate_spectrum'],
+                            new_folder_button_img_path=paths['new_folder'],
+                            export_finish_button_img_path=paths['export_finish'],
+                            delete_button_img_path=paths['delete'],
+                            sync_button_img_path=paths['sync'])
+    grabber = FakeGrabber()
+    analyzer._screen_grabber = lambda: grabber
+
+    def show(frame):
+        grabber.frame = frame
+        analyzer._screen_cache = None
+    analyzer.show = show
+    yield analyzer
+    analyzer.close()
+
+
+def assert_found(analyzer, centers, tolerance):
+    for name, (x, y) in centers.items():
+        (found_x, found_y) = analyzer.get_button_pos(name)
+        assert abs(found_x - x) <= tolerance and abs(found_y - y) <= tolerance, (name, (found_x, found_y), (x, y))
+
+
+def test_find_all_buttons_native_scale(analyzer):
+    (screen, centers) = draw_screen()
+    analyzer.show(screen)
+    analyzer.find_all_buttons()
+    assert_found(analyzer, centers, 2)
+
+
+@pytest.mark.parametrize('factor', [0.8333333333333333, 1.5])
+def test_find_all_buttons_scaled_screen(analyzer, factor, monkeypatch):
+    (screen, centers) = scale_screen(*draw_screen(), factor)
+    analyzer.show(screen)
+    analyzer.find_all_buttons()
+    assert_found(analyzer, centers, 3)
+    # the buttons are found again in their windows at the scale found by the sweep
+    def sweep(*args):
+        raise AssertionError('the scales were swept again')
+    monkeypatch.setattr(analyzer, '_match_scales', sweep)
+    analyzer.show(screen)
+    analyzer.find_all_buttons()
+    assert_found(analyzer, centers, 3)
+
+
+def test_scale_sweep_native_scale(analyzer):
+    # the sweep alone, as if the native scale match had failed
+    analyzer.MATCH_NATIVE_MIN = 1.1
+    (screen, centers) = draw_screen()
+    analyzer.show(screen)
+    analyzer.find_all_buttons()
+    assert_found(analyzer, centers, 3)
+
+
+def test_find_all_buttons_moved(analyzer):
+    (screen, _) = draw_screen()
+    analyzer.show(screen)
+    analyzer.find_all_buttons()
+    # the last locations are searched first, the whole screen only when the buttons are not there
+    (screen, centers) = draw_screen(offset=(200, 100))
+    # blank buttons left behind match weakly within the last locations
+    for (_, (x, y), (w, h)) in BUTTONS.values():
+        cv2.rectangle(screen, (x, y), (x + w, y + h), (255, 255, 255, 255), -1)
+        cv2.rectangle(screen, (x, y), (x + w, y + h), (20, 20, 20, 255), 2)
+    analyzer.show(screen)
+    analyzer.find_all_buttons()
+    assert_found(analyzer, centers, 2)
+
+
+def test_find_all_buttons_keeps_found_buttons(analyzer):
+    # the hidden button would otherwise be taken for a look-alike control
+    analyzer.MATCH_MIN_CONFIDENCE = 0.9
+    (screen, centers) = draw_screen(hidden=('sync',))
+    analyzer.show(screen)
+    with pytest.raises(ButtonNotFoundError, match='sync'):
+        analyzer.find_all_buttons()
+    del centers['sync']
+    assert_found(analyzer, centers, 2)
+
+
+def test_find_all_buttons_smaller_screen(analyzer):
+    (screen, _) = scale_screen(*draw_screen(), 1.5)
+    analyzer.show(screen)
+    analyzer.find_all_buttons()
+    # the windows of the larger screen partly lie outside the native one
+    (screen, centers) = draw_screen()
+    analyzer.show(screen)
+    analyzer.find_all_buttons()
+    assert_found(analyzer, centers, 2)
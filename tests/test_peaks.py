@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import libs_analyzer
+from libs_analyzer import LIBSAnalyzer
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    analyzer = LIBSAnalyzer(str(tmp_path), str(tmp_path))
+    yield analyzer
+    analyzer.close()
+
+
+def write_spectrum(path, reverse=False):
+    """Write a synthetic spectrum with a line at 671 nm in the export format of Profile Builder."""
+    x = np.linspace(660.0, 680.0, 2001)
+    y = 10.0 * np.exp(-0.5 * ((x - 671.0) / 0.3) ** 2) + 1.0
+    if reverse:
+        (x, y) = (x[::-1], y[::-1])
+    pd.DataFrame({'wavelength': x, 'intensity': y}).to_csv(path, index=False)
+
+
+def test_warm_up_compiles_the_signature_of_find_all_peaks(analyzer, tmp_path):
+    analyzer.warm_up()
+    for reverse in (False, True):
+        path = tmp_path / f'spectrum_{reverse}.csv'
+        write_spectrum(path, reverse)
+        areas = analyzer.find_all_peaks(str(path))
+        assert areas['669.0 - 673.0'] == pytest.approx(10.0 * 0.3 * np.sqrt(2 * np.pi), rel=1e-2)
+    assert len(libs_analyzer._integrate_ranges.signatures) == 1
+
+
+@pytest.mark.parametrize('y, prominence', [
+    ([0, 0, 1, 5, 9, 9, 9, 9, 4, 1, 0, 0], 2.0),
+    ([0, 1, 2, 2, 3, 0], 0.0),
+    ([0, 3, 3, 5, 5, 1, 4, 4, 4, 0], 1.0),
+    ([5, 5, 5, 5], 0.0),
+])
+def test_find_peaks_batch_plateaus_match_scipy(analyzer, y, prominence):
+    signal = pytest.importorskip('scipy.signal')
+    (expected, _) = signal.find_peaks(np.array(y, dtype=float), prominence=prominence)
+    (peaks,) = analyzer.find_peaks_batch(np.array([y]), prominence)
+    assert peaks.tolist() == expected.tolist()
+
+
+def test_find_peaks_batch_matches_scipy(analyzer):
+    signal = pytest.importorskip('scipy.signal')
+    # small integers give many flat tops and exact prominences
+    spectra = np.random.default_rng(0).integers(0, 12, size=(50, 300)).astype(np.float32)
+    for prominence in (0.0, 3.0, 7.0):
+        for y, peaks in zip(spectra, analyzer.find_peaks_batch(spectra, prominence)):
+            (expected, _) = signal.find_peaks(y.astype(float), prominence=prominence)
+            assert peaks.tolist() == expected.tolist()